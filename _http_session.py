@@ -0,0 +1,26 @@
+"""Shared HTTP plumbing for the manual backend test scripts."""
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BASE_URL = "http://localhost:8000"
+
+# One pooled keep-alive session for every call, with a couple of quick retries
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                                     max_retries=Retry(total=2, backoff_factor=0.1)))
+SESSION.headers["Connection"] = "keep-alive"
+
+
+def wait_for_server(timeout=5.0, interval=0.1):
+    """Poll /status until the backend answers (or the timeout passes)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            SESSION.get(f"{BASE_URL}/status", timeout=1)
+            return True
+        except requests.exceptions.RequestException:
+            time.sleep(interval)
+    return False
@@ -14,6 +14,8 @@ WEBHOOK_API_KEY = os.getenv("WEBHOOK_API_KEY", "").strip()
 # Example: export WEBHOOK_IP_WHITELIST="1.2.3.4,5.6.7.8"
 _raw_whitelist = os.getenv("WEBHOOK_IP_WHITELIST", "").strip()
 WEBHOOK_IP_WHITELIST = [ip.strip() for ip in _raw_whitelist.split(",") if ip.strip()]
+# Set form for O(1) membership checks on every webhook request.
+WEBHOOK_IP_WHITELIST_SET = frozenset(WEBHOOK_IP_WHITELIST)
 
 # Rate limit for webhook requests (requests per minute) — integer.
 # Default 30 req/minute. Set to 0 to disable rate limiting.
@@ -2,14 +2,18 @@
 from __future__ import annotations
 
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 import os
+import queue
 import sqlite3
 import time
 import uuid
 from typing import Any, Dict, Optional
 
+import orjson
+
 from fastapi import FastAPI, Query, Header
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # ====== Dhan credentials (prefer env vars, fallback to hardcoded) ======
@@ -27,7 +31,7 @@ from scheduler import (
     ensure_fresh_db,
 )
 from webhook import router as webhook_router
-from paper_trading import router as paper_router
+from paper_trading import router as paper_router, HTTP_SESSION
 from orders import (
     broker_ready,
     get_funds,
@@ -37,6 +41,7 @@ from orders import (
     place_order_via_broker,
     cancel_order_via_broker,
     init_broker,
+    map_product_for_sdk,
     normalize_response,
 )
 
@@ -48,14 +53,29 @@ logging.basicConfig(
 )
 LOG = logging.getLogger("backend")
 
-# Setup alerts logging with daily rotation
+class AlertFormatter(logging.Formatter):
+    """Appends the record's `alert` extra (if any) to the line as JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        alert = getattr(record, "alert", None)
+        if alert is None:
+            return line
+        return f"{line} | {orjson.dumps(alert, default=str).decode()}"
+
+# Setup alerts logging with daily rotation. Webhook code only enqueues records;
+# formatting and file I/O happen on the listener's thread.
 handler = TimedRotatingFileHandler("alerts.log", when="midnight", backupCount=7)
-formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+formatter = AlertFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
 handler.setFormatter(formatter)
 
+alerts_queue: queue.SimpleQueue = queue.SimpleQueue()
+alerts_listener = QueueListener(alerts_queue, handler)
+alerts_listener.start()
+
 alerts_logger = logging.getLogger("alerts")
 alerts_logger.setLevel(logging.INFO)
-alerts_logger.addHandler(handler)
+alerts_logger.addHandler(QueueHandler(alerts_queue))
 
 from config import SQLITE_PATH, CORS_ORIGINS
 
@@ -74,8 +94,6 @@ app.include_router(paper_router)
 
 @app.middleware("http")
 async def add_request_id(request, call_next):
-    import time, uuid, logging
-    LOG = logging.getLogger("backend")
     rid = request.headers.get("X-Request-ID", str(uuid.uuid4()))
     start = time.time()
     response = None
@@ -84,7 +102,6 @@ async def add_request_id(request, call_next):
         return response
     except Exception:
         LOG.exception("Unhandled exception | rid=%s", rid)
-        from fastapi.responses import JSONResponse
         return JSONResponse(
             status_code=500,
             content={"status": "error", "message": "Internal Server Error", "rid": rid},
@@ -148,6 +165,10 @@ def app_shutdown():
             LOG.info("Scheduler shut down cleanly")
         except Exception:
             LOG.exception("Scheduler shutdown failed")
+    # Release pooled connections to the Dhan API
+    HTTP_SESSION.close()
+    # Flush queued alert records to alerts.log
+    alerts_listener.stop()
 
 @app.get("/status")
 def api_status():
@@ -276,13 +297,13 @@ def api_place_order(
         # try to fetch instrument record by security_id for lotSize if possible
         try:
             with sqlite3.connect(SQLITE_PATH) as conn:
+                conn.row_factory = sqlite3.Row
                 cur = conn.execute(
                     "SELECT securityId, tradingSymbol, segment, lotSize, expiry FROM instruments WHERE securityId = ? LIMIT 1",
                     (str(security_id),)
                 ).fetchone()
                 if cur:
-                    cols = ["securityId", "tradingSymbol", "segment", "lotSize", "expiry"]
-                    inst = dict(zip(cols, cur))
+                    inst = dict(cur)
         except Exception:
             LOG.exception("(%s) DB lookup by security_id failed", rid)
 
@@ -331,7 +352,6 @@ def api_place_order(
     )
     normalized = normalize_response(raw_res, success_msg="Order placed successfully", error_msg="Order rejected")
     elapsed = time.time() - t0
-    from fastapi.responses import JSONResponse
     preview = {
             "symbol": symbol, "segment": segment, "side": side, "qty": int(computed_qty),
             "order_type": order_type, "price": float(price or 0),
@@ -387,7 +407,6 @@ def api_place_order_simple(
 
 @app.get("/debug/broker")
 def debug_broker():
-    from orders import get_funds, get_holdings, get_positions, get_order_list, broker_ready
     ok, why = broker_ready()
     res = {
         "broker_ready": ok,
@@ -407,7 +426,6 @@ def debug_resolve(symbol: str, segment: str):
 
 @app.get("/debug/instruments/count")
 def debug_inst_count():
-    import os, sqlite3
     if not os.path.exists(SQLITE_PATH):
         return {"exists": False, "rows": 0}
     with sqlite3.connect(SQLITE_PATH) as conn:
@@ -416,7 +434,6 @@ def debug_inst_count():
 
 @app.get("/debug/segments")
 def debug_segments():
-    import sqlite3
     with sqlite3.connect(SQLITE_PATH) as conn:
         rows = conn.execute("SELECT DISTINCT segment, COUNT(*) FROM instruments GROUP BY segment").fetchall()
         return [{"segment": r[0], "count": r[1]} for r in rows]
@@ -424,8 +441,6 @@ def debug_segments():
 @app.get("/debug/product-mapping")
 def debug_product_mapping():
     """Test product mapping for different combinations"""
-    from orders import map_product_for_sdk
-    
     test_cases = [
         ("INTRADAY", "NSE_FNO"),
         ("DELIVERY", "NSE_FNO"),
@@ -5,6 +5,7 @@ import json
 import logging
 import os
 import sys
+import traceback
 from typing import Dict, Any, Optional, Tuple
 
 from dhanhq import dhanhq
@@ -96,6 +97,7 @@ def init_broker(client_id: str, access_token: str) -> Tuple[bool, str]:
         return False, _dhan_error
 
 def broker_ready() -> Tuple[bool, str]:
+    """In-memory readiness flag set by init_broker(); no SDK or network call, cheap per request."""
     return (_dhan_ready and _dhan is not None), _dhan_error
 
 
@@ -109,7 +111,6 @@ def normalize_response(res, success_msg="Success", error_msg="Error"):
     try:
         # Exceptions
         if isinstance(res, Exception):
-            import traceback
             raw = str(res) or repr(res)
             lower = raw.lower()
             if "insufficient" in lower or "margin" in lower:
@@ -9,6 +9,7 @@
 from fastapi import APIRouter, Query, HTTPException, Request
 import os
 import sqlite3
+import threading
 import time
 import requests
 import json
@@ -46,6 +47,11 @@ else:
 
 router = APIRouter(prefix="/paper", tags=["paper"])
 
+# Shared HTTP session for Dhan REST calls: keeps TCP+TLS connections to the API
+# alive across webhooks instead of handshaking on every LTP fetch.
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
 # simple in-memory enabled flag; persisted via file for restart-preservation
 _enabled_file = ".paper_enabled"
 
@@ -170,6 +176,11 @@ def _update_trade_exit(trade_id, exit_price, exit_ts, matched_qty, gross_pnl, ne
     conn.commit()
     conn.close()
 
+# execute_paper_trade_using_alert reads the open entries and then updates their
+# matched_qty; webhooks call it from the threadpool, so serialize executions to keep
+# concurrent alerts from matching the same open entry twice.
+_PAPER_EXEC_LOCK = threading.Lock()
+
 def execute_paper_trade_using_alert(payload: dict):
     """
     New unified handler to be used by webhook / manual calls.
@@ -187,6 +198,10 @@ def execute_paper_trade_using_alert(payload: dict):
       - For exit: compute executed_price similarly, then FIFO-match with open opposite-side entries to compute gross/net PnL for matched quantities. Charge applied once per matched pair (charge in payload or default)
     Returns: dict with recorded trade(s) and computed PnL details
     """
+    with _PAPER_EXEC_LOCK:
+        return _execute_paper_trade(payload)
+
+def _execute_paper_trade(payload: dict):
     _ensure_schema()
     # validate
     side = (payload.get("side") or "BUY").upper()
@@ -371,11 +386,14 @@ def execute_paper_trade_using_alert(payload: dict):
 
 
 # Dhan LTP fetcher (robust with detailed logging and multiple payload strategies)
-def fetch_ltp_from_dhan(security_id: str, segment: str, log_details: bool = False) -> Optional[float]:
+def fetch_ltp_from_dhan(security_id: str, segment: str, log_details: bool = False,
+                        session: Optional[requests.Session] = None) -> Optional[float]:
     """Fetch LTP from Dhan /marketfeed/ltp endpoint.
     Returns float or None if not available/zero.
     This version tries a few payload shapes and segment variants to increase success rate.
+    Uses the shared HTTP_SESSION unless a session is passed in.
     """
+    session = session or HTTP_SESSION
     if not DHAN_ACCESS_TOKEN or not DHAN_CLIENT_ID:
         LOG.error("LTP fetch failed: DHAN_ACCESS_TOKEN or DHAN_CLIENT_ID not set (paper_trading)")
         return None
@@ -428,7 +446,7 @@ def fetch_ltp_from_dhan(security_id: str, segment: str, log_details: bool = Fals
             LOG.info(f"Fetching LTP for security_id={security_id}, segment={segment} using payload keys: {list(payload.keys())}")
             LOG.debug(f"API URL: {url}")
             LOG.debug(f"Payload: {payload}")
-            r = requests.post(url, json=payload, headers=headers, timeout=8)
+            r = session.post(url, json=payload, headers=headers, timeout=8)
             LOG.info(f"Dhan API response status: {r.status_code}")
             if r.status_code != 200:
                 LOG.warning(f"Dhan API returned status {r.status_code}: {r.text[:200]}")
@@ -6,9 +6,11 @@ import logging
 import os
 import sqlite3
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 import pandas as pd
+import pytz
 import numpy as np
 import requests
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -17,11 +19,61 @@ LOG = logging.getLogger("scheduler")
 
 DEFAULT_DB = os.getenv("INSTRUMENTS_DB", "instruments.db")
 MASTER_URL = os.getenv("DHAN_MASTER_URL", "https://images.dhan.co/api-data/api-scrip-master.csv")
+FRESHNESS_CHECK_MINUTES = int(os.getenv("DB_FRESHNESS_CHECK_MINUTES", "15"))
+IST = pytz.timezone("Asia/Kolkata")
+
+# Bumped whenever the instruments DB file is replaced, removed or altered, so
+# long-lived readers (see webhook._instruments_conn) know to reopen it.
+_db_version = 0
+
+def db_version() -> int:
+    return _db_version
+
+def _bump_db_version() -> None:
+    global _db_version
+    _db_version += 1
 
 # ---- helpers ----
 def _connect(db_path: str) -> sqlite3.Connection:
     return sqlite3.connect(db_path, timeout=30, isolation_level=None)
 
+# Lookup columns derived from tradingSymbol/expiry (e.g. 'NIFTY-Nov2025-26000-CE'
+# -> underlying NIFTY, strike 26000, opt_type CE, expiry_date 2025-11-25), so the
+# webhook finders can do indexed equality lookups instead of pattern matching.
+_DERIVED_COLUMNS = {
+    "tradingSymbol_u": "TEXT",
+    "underlying": "TEXT",
+    "strike": "REAL",
+    "opt_type": "TEXT",
+    "expiry_date": "TEXT",
+}
+
+def _populate_derived_columns(cur: sqlite3.Cursor) -> None:
+    cur.execute("UPDATE instruments SET tradingSymbol_u = UPPER(tradingSymbol) WHERE tradingSymbol_u IS NULL")
+    cur.execute(
+        """
+        UPDATE instruments SET
+            underlying = CASE WHEN instr(tradingSymbol_u, '-') > 0
+                              THEN substr(tradingSymbol_u, 1, instr(tradingSymbol_u, '-') - 1) END,
+            opt_type = CASE WHEN tradingSymbol_u GLOB '*-CE' THEN 'CE'
+                            WHEN tradingSymbol_u GLOB '*-PE' THEN 'PE'
+                            WHEN tradingSymbol_u GLOB '*-FUT' THEN 'FUT' END,
+            expiry_date = CASE WHEN expiry GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+                               THEN substr(expiry, 1, 10) END
+        """
+    )
+    # strike is the numeric segment before '-CE'/'-PE': drop the 3-char suffix, then
+    # take what rtrim() of the digits leaves behind
+    cur.execute(
+        """
+        UPDATE instruments SET strike = CAST(
+            substr(substr(tradingSymbol_u, 1, length(tradingSymbol_u) - 3),
+                   length(rtrim(substr(tradingSymbol_u, 1, length(tradingSymbol_u) - 3), '0123456789.')) + 1)
+            AS REAL)
+        WHERE opt_type IN ('CE', 'PE')
+        """
+    )
+
 def _ensure_indexes(conn: sqlite3.Connection) -> None:
     cur = conn.cursor()
     cur.execute(
@@ -29,15 +81,35 @@ def _ensure_indexes(conn: sqlite3.Connection) -> None:
         CREATE TABLE IF NOT EXISTS instruments (
             securityId TEXT,
             tradingSymbol TEXT,
+            tradingSymbol_u TEXT,
             segment TEXT,
             lotSize INTEGER,
-            expiry TEXT
+            expiry TEXT,
+            underlying TEXT,
+            strike REAL,
+            opt_type TEXT,
+            expiry_date TEXT
         )
         """
     )
+    # Freshly ingested tables and DBs built by older versions lack (some of) the
+    # derived columns: add and backfill them in place
+    cols = {r[1] for r in cur.execute("PRAGMA table_info(instruments)")}
+    missing = [c for c in _DERIVED_COLUMNS if c not in cols]
+    for col in missing:
+        cur.execute(f"ALTER TABLE instruments ADD COLUMN {col} {_DERIVED_COLUMNS[col]}")
+    if missing:
+        _populate_derived_columns(cur)
     cur.execute("CREATE INDEX IF NOT EXISTS idx_tradingsymbol ON instruments(tradingSymbol)")
+    # Uppercased symbol: resolve_symbol's case-insensitive exact match
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tradingsymbol_u ON instruments(tradingSymbol_u, expiry)")
+    # Options: underlying+opt_type+strike equality, expiry_date range/order.
+    # Futures use the (underlying, opt_type) prefix.
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_contract ON instruments(underlying, opt_type, strike, expiry_date)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_segment ON instruments(segment)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_securityid ON instruments(securityId)")
+    # Nothing filters on raw expiry any more (finders use expiry_date via idx_contract)
+    cur.execute("DROP INDEX IF EXISTS idx_expiry")
     conn.commit()
 
 # Column candidates from Dhan CSV (actual headers)
@@ -113,6 +185,7 @@ def download_and_populate(db_path: Optional[str] = None) -> Dict[str, str | int]
         out = pd.DataFrame()
         out["securityId"] = df[sec_col].astype(str)
         out["tradingSymbol"] = df[ts_col].astype(str)
+        out["tradingSymbol_u"] = out["tradingSymbol"].str.upper()
         out["segment"] = [
             _norm_segment(df[segc].iloc[i] if segc else None, df[segt].iloc[i] if segt else None, df[ts_col].iloc[i])
             for i in range(len(df))
@@ -135,14 +208,13 @@ def download_and_populate(db_path: Optional[str] = None) -> Dict[str, str | int]
 
         conn = sqlite3.connect(tmp_path)
         out.to_sql("instruments", conn, if_exists="replace", index=False)
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_tradingsymbol ON instruments(tradingSymbol)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_securityid ON instruments(securityId)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_segment ON instruments(segment)")
+        _ensure_indexes(conn)
         conn.execute("VACUUM")
         conn.commit()
         conn.close()
 
         os.replace(tmp_path, db_path)
+        _bump_db_version()
         LOG.info("✅ instruments saved to %s (rows=%d)", db_path, len(out))
         return {"status": "success", "rows": int(len(out))}
     except Exception as e:
@@ -154,6 +226,7 @@ def cleanup_instruments(db_path: Optional[str] = None) -> Dict[str, str]:
     try:
         if os.path.exists(db_path):
             os.remove(db_path)
+            _bump_db_version()
             LOG.info("🗑 Deleted %s", db_path)
             return {"message": "DB removed"}
         LOG.info("ℹ️ %s not present; nothing to delete", db_path)
@@ -177,6 +250,7 @@ def symbol_search(db_path: Optional[str], query: str, segment: str, limit: int =
     if not query or not os.path.exists(db_path):
         return []
     with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
         sql = """
           SELECT securityId, tradingSymbol, segment, lotSize, expiry
           FROM instruments
@@ -189,47 +263,97 @@ def symbol_search(db_path: Optional[str], query: str, segment: str, limit: int =
           LIMIT ?
         """
         rows = conn.execute(sql, (f"%{query.strip()}%", (segment or "").strip(), int(limit))).fetchall()
-        cols = ["securityId", "tradingSymbol", "segment", "lotSize", "expiry"]
-        return [dict(zip(cols, r)) for r in rows]
+        return [dict(r) for r in rows]
 
 def resolve_symbol(db_path: Optional[str], symbol: str, segment: str) -> Optional[Dict[str, str | int]]:
-    if not symbol or not os.path.exists(db_path):
+    if not symbol or not db_path:
         return None
+    try:
+        mtime_ns = os.stat(db_path).st_mtime_ns
+    except OSError:
+        return None
+    # Keyed by mtime so a rewritten DB busts the cache; copy so callers can't mutate it
+    inst = _cached_resolve(mtime_ns, db_path, symbol.strip(), (segment or "").strip())
+    return dict(inst) if inst else None
+
+@lru_cache(maxsize=512)
+def _cached_resolve(db_mtime_ns: int, db_path: str, symbol: str, segment: str) -> Optional[Dict[str, str | int]]:
     with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
         sql = """
           SELECT securityId, tradingSymbol, segment, lotSize, expiry
           FROM instruments
-          WHERE LOWER(tradingSymbol) = LOWER(?)
-            AND UPPER(segment) = UPPER(?)
+          WHERE tradingSymbol_u = ?
+            AND UPPER(segment) = ?
           LIMIT 1
         """
-        row = conn.execute(sql, (symbol.strip(), (segment or "").strip())).fetchone()
+        # tradingSymbol_u is stored uppercased, so the match is an idx_tradingsymbol_u SEARCH
+        row = conn.execute(sql, (symbol.upper(), segment.upper())).fetchone()
         if not row:
             return None
-        cols = ["securityId", "tradingSymbol", "segment", "lotSize", "expiry"]
-        return dict(zip(cols, row))
+        return dict(row)
 
 # ------------- Scheduler -------------
 _sched: Optional[BackgroundScheduler] = None
+_upgraded: set = set()
+
+def scheduler_running() -> bool:
+    """True when the background scheduler (and so the freshness job) is active."""
+    return _sched is not None and _sched.running
+
+def _upgrade_db(db_path: str) -> None:
+    """
+    Bring a DB built by an older version up to the current schema (once per process).
+    The file's timestamps are restored afterwards, so upgrading a stale DB doesn't
+    make it look current to db_is_current/ensure_fresh_db.
+    """
+    if db_path in _upgraded or not os.path.exists(db_path):
+        return
+    try:
+        st = os.stat(db_path)
+        conn = _connect(db_path)
+        try:
+            _ensure_indexes(conn)
+        finally:
+            conn.close()
+        os.utime(db_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        _upgraded.add(db_path)
+        _bump_db_version()
+    except Exception:
+        LOG.exception("Instrument DB schema upgrade failed for %s", db_path)
 
 def ensure_fresh_db(db_path: str) -> bool:
     """
     Ensure instruments DB exists and is from today.
     Returns True if a fresh download was triggered.
     """
-    from datetime import datetime
-    if not os.path.exists(db_path):
-        download_and_populate(db_path)
+    stale = True
+    if os.path.exists(db_path):
+        try:
+            mtime = datetime.fromtimestamp(os.path.getmtime(db_path))
+            stale = mtime.date() != datetime.now().date()
+        except Exception:
+            pass
+    if stale and download_and_populate(db_path).get("status") == "success":
         return True
-    try:
-        mtime = datetime.fromtimestamp(os.path.getmtime(db_path))
-        if mtime.date() != datetime.now().date():
-            download_and_populate(db_path)
-            return True
-    except Exception:
-        download_and_populate(db_path)
-        return True
-    return False
+    # Current DB, or the download failed and we keep serving the old file:
+    # either way the finders need the current schema
+    _upgrade_db(db_path)
+    return stale
+
+def _freshness_check(db_path: str) -> None:
+    """
+    Interval job: between the 08:00 download and the 15:45 cleanup (IST), refresh
+    a stale DB or upgrade a current one. Outside that window, or when the file is
+    absent, it does nothing; the download_job cron and startup check own those cases.
+    """
+    now = datetime.now(IST)
+    if not ((8, 0) <= (now.hour, now.minute) < (15, 45)):
+        return
+    if not os.path.exists(db_path):
+        return
+    ensure_fresh_db(db_path)
+
 
 def start_scheduler(db_path: Optional[str] = None) -> BackgroundScheduler:
     global _sched
@@ -243,7 +367,8 @@ def start_scheduler(db_path: Optional[str] = None) -> BackgroundScheduler:
         return _sched
 
     db_path = db_path or DEFAULT_DB
-    LOG.info("⏳ Starting scheduler (IST): 08:00 download, 15:45 cleanup | db=%s", db_path)
+    LOG.info("⏳ Starting scheduler (IST): 08:00 download, 15:45 cleanup, freshness check every %d min (08:00-15:45) | db=%s",
+             FRESHNESS_CHECK_MINUTES, db_path)
 
     _sched = BackgroundScheduler(timezone="Asia/Kolkata")
     _sched.add_job(
@@ -266,6 +391,17 @@ def start_scheduler(db_path: Optional[str] = None) -> BackgroundScheduler:
         misfire_grace_time=300,  # 5 minutes
         max_instances=1
     )
+    # Keeps the instruments DB current off the webhook request path
+    # (download_and_populate bumps db_version so pooled readers reopen).
+    _sched.add_job(
+        lambda: _freshness_check(db_path),
+        "interval",
+        minutes=FRESHNESS_CHECK_MINUTES,
+        id="freshness_job",
+        replace_existing=True,
+        misfire_grace_time=300,  # 5 minutes
+        max_instances=1
+    )
     try:
         _sched.start()
         LOG.info("✅ Scheduler started")
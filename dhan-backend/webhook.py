@@ -1,105 +1,313 @@
 # webhook.py
-import json
+import asyncio
 import logging
+import itertools
 import sqlite3
-import uuid
+import threading
 import os
-from datetime import datetime
-from fastapi import APIRouter, Request
+from collections import deque
+from copy import deepcopy
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from fastapi import APIRouter, BackgroundTasks, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
 from dateutil import parser
+import msgspec
+import orjson
 
 from orders import broker_ready, place_order_via_broker, normalize_response, map_product_for_sdk
-from scheduler import ensure_fresh_db
-from config import SQLITE_PATH, WEBHOOK_API_KEY, WEBHOOK_IP_WHITELIST, WEBHOOK_RATE_LIMIT
+from paper_trading import _read_enabled, execute_paper_trade_using_alert, fetch_ltp_from_dhan
+from scheduler import db_is_current, db_version, ensure_fresh_db, scheduler_running
+from config import SQLITE_PATH, WEBHOOK_API_KEY, WEBHOOK_IP_WHITELIST_SET, WEBHOOK_RATE_LIMIT
 import time
 
 LOG = logging.getLogger("webhook")
 ALERTS_LOGGER = logging.getLogger("alerts")
-router = APIRouter(prefix="/webhook", tags=["webhook"])
+router = APIRouter(prefix="/webhook", tags=["webhook"], default_response_class=ORJSONResponse)
 
 # Paper trading integration
 def _paper_enabled():
     """Check if paper trading mode is enabled"""
     try:
-        from paper_trading import _read_enabled
         return _read_enabled()
     except Exception:
         return False
 
+# Bodies up to this size are read into a buffer pre-sized from Content-Length
+_MAX_PRESIZED_BODY = 1 << 20
+
+
+async def _read_body_fast(req: Request) -> bytes | bytearray:
+    """Read the request body into one bytearray sized from Content-Length (falls back to req.body())."""
+    try:
+        cl = int(req.headers.get("content-length") or 0)
+    except ValueError:
+        cl = 0
+    if not 0 < cl < _MAX_PRESIZED_BODY:
+        return await req.body()
+    buf = bytearray(cl)
+    off = 0
+    async for chunk in req.stream():
+        # slice assignment also grows the buffer if the client sent more than it declared
+        buf[off:off + len(chunk)] = chunk
+        off += len(chunk)
+    if off < cl:
+        del buf[off:]
+    return buf
+
+
+_FORM_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+
+
+async def _parse_tv_request(req: Request) -> dict:
+    """
+    Decode a TradingView webhook body, dispatching on Content-Type:
+    form posts use their "alert" field (JSON) or the fields themselves; anything
+    else (application/json, TradingView's text/plain) is parsed as JSON with orjson.
+    Malformed, empty or non-object payloads give {}.
+    """
+    ct = req.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    try:
+        if ct in _FORM_TYPES:
+            form = await req.form()
+            body = orjson.loads(form["alert"]) if "alert" in form else dict(form)
+        else:
+            raw = await _read_body_fast(req)
+            body = orjson.loads(raw) if raw else {}
+    except Exception as e:
+        LOG.warning("Could not parse webhook body (content-type=%s): %s", ct or "-", e)
+        return {}
+    return body if isinstance(body, dict) else {}
+
+# Fallback DB freshness check for when the scheduler's freshness job isn't running:
+# at most one mtime check per interval, and any rebuild runs off the event loop.
+_LAST_FRESH_CHECK = 0.0
+_FRESH_INTERVAL = 60.0
+_refresh_task: asyncio.Task | None = None
+
+
+def _maybe_refresh_db() -> None:
+    global _LAST_FRESH_CHECK, _refresh_task
+    now = time.monotonic()
+    if now - _LAST_FRESH_CHECK < _FRESH_INTERVAL:
+        return
+    _LAST_FRESH_CHECK = now
+    if scheduler_running() or (_refresh_task and not _refresh_task.done()):
+        return
+    if not db_is_current(SQLITE_PATH):
+        LOG.info("Instruments DB is stale; refreshing in the background")
+        _refresh_task = asyncio.create_task(run_in_threadpool(ensure_fresh_db, SQLITE_PATH))
+
+
 # In-memory small rate-limiter store: { client_ip: [timestamps...] }
 # Lightweight and resets when the process restarts.
 RATE_LIMIT_STORE = {}
 RATE_LIMIT_WINDOW_SECONDS = 60  # window for WEBHOOK_RATE_LIMIT (per-minute)
 
-# Global alerts log - newest first
-ALERTS_LOG = []
+# Request IDs: nanosecond clock + per-process counter, so generating one needs
+# no urandom syscall or UUID object. Handlers take one time.time_ns() reading
+# and derive the rid, ts_epoch and timestamp from it.
+_ID_COUNTER = itertools.count()
+
+
+def _new_rid(ns: int | None = None) -> str:
+    if ns is None:
+        ns = time.time_ns()
+    return f"{ns:x}-{next(_ID_COUNTER):x}"
+
+
+# Alert timestamps at second resolution; bursts of alerts within the same
+# second reuse the already formatted string. (epoch_second, iso_string)
+_ts_cache = (0, "")
+
+
+def _now_iso(ns: int) -> str:
+    global _ts_cache
+    sec = ns // 1_000_000_000
+    cached = _ts_cache
+    if cached[0] != sec:
+        cached = (sec, datetime.fromtimestamp(sec).isoformat())
+        _ts_cache = cached
+    return cached[1]
+
+
+# Global alerts log - newest first; the deque drops the oldest entry itself
 MAX_ALERTS = 100
+ALERTS_LOG = deque(maxlen=MAX_ALERTS)
+ALERTS_MAX_AGE_MS = 86_400_000  # alerts older than 24h are pruned
+
+# Serialized GET /alerts payload; rebuilt lazily after the log changes
+_ALERTS_LOCK = threading.Lock()
+_alerts_cache_bytes: bytes | None = None
+
+
+def _push_alert(alert_entry: dict) -> None:
+    """Add an alert to the in-memory log (newest first) and drop the cached payload."""
+    global _alerts_cache_bytes
+    with _ALERTS_LOCK:
+        ALERTS_LOG.appendleft(alert_entry)
+        _prune_alerts()
+        _alerts_cache_bytes = None
+
+
+def _prune_alerts() -> bool:
+    """Drop alerts older than ALERTS_MAX_AGE_MS from the tail; caller holds _ALERTS_LOCK."""
+    cutoff = int(time.time() * 1000) - ALERTS_MAX_AGE_MS
+    pruned = False
+    while ALERTS_LOG and ALERTS_LOG[-1]["ts_epoch"] < cutoff:
+        ALERTS_LOG.pop()
+        pruned = True
+    return pruned
+
+
+def _record_alert(tag: str, alert_entry: dict) -> None:
+    """
+    Background task (runs after the webhook response is sent): snapshot the
+    request payloads, store the alert for the dashboard and write it to alerts.log.
+    """
+    for key in ("trade", "converted_payload"):
+        if key in alert_entry:
+            alert_entry[key] = deepcopy(alert_entry[key])
+    _push_alert(alert_entry)
+    ALERTS_LOGGER.info(tag, extra={"alert": alert_entry})
+
+
+# Per-thread read-only connections to the instruments DB, opened once and
+# reused so lookups skip connect/schema parsing and hit SQLite's statement
+# cache. The file can be swapped (os.replace) or altered by this process's
+# scheduler or by another process, so the thread reopens whenever the file's
+# (inode, mtime) or the in-process scheduler.db_version() changes.
+_TLS = threading.local()
+
+
+def _instruments_conn(db_path: str) -> sqlite3.Connection:
+    try:
+        st = os.stat(db_path)
+        key = (db_path, st.st_ino, st.st_mtime_ns, db_version())
+    except OSError:
+        key = (db_path, None, None, db_version())
+    conn = getattr(_TLS, "conn", None)
+    if conn is None or _TLS.key != key:
+        if conn is not None:
+            conn.close()
+        uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=1")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-20000")
+        _TLS.conn, _TLS.key = conn, key
+    return conn
 
 
 def parse_expiry(exp_str: str):
     """Robust expiry date parsing."""
     if not exp_str or exp_str == "0001-01-01":
         return None
+    # Fast path: 'YYYY-MM-DD', optionally followed by a ' '/'T' time part
+    s = exp_str
+    if len(s) >= 10 and s[4] == "-" and s[7] == "-" and (len(s) == 10 or s[10] in " T"):
+        try:
+            return date(int(s[:4]), int(s[5:7]), int(s[8:10]))
+        except ValueError:
+            pass
     try:
-        return datetime.strptime(exp_str, "%Y-%m-%d").date()
+        return parser.parse(exp_str, fuzzy=True).date()
     except Exception:
-        try:
-            return parser.parse(exp_str, fuzzy=True).date()
-        except Exception:
-            return None
+        return None
+
+
+# Checked in order, so NIFTY wins over an exchange prefix ("NSE:BANKNIFTY" is
+# NSE_FNO). All index option underlyings contain NIFTY, so one needle covers them.
+_SEG_NEEDLES = (("NIFTY", "NSE_FNO"), ("MCX", "MCX"), ("BSE", "BSE_EQ"), ("NSE", "NSE_EQ"))
 
 
 def infer_segment_from_symbol(symbol: str) -> str:
     """Infer segment from trading symbol when database segment is None."""
     s = symbol.upper()
-    if any(idx in s for idx in ("NIFTY", "BANKNIFTY", "FINNIFTY", "MIDCPNIFTY")):
-        return "NSE_FNO"
-    if "MCX" in s:
-        return "MCX"
-    if "BSE" in s:
-        return "BSE_EQ"
-    if "NSE" in s:
-        return "NSE_EQ"
+    for needle, segment in _SEG_NEEDLES:
+        if needle in s:
+            return segment
     return "NSE_FNO"  # safe default
 
 
+class TVAlert(msgspec.Struct):
+    """Fields the trade/futures webhooks read from a TradingView alert (unknown keys are ignored)."""
+    index: str = ""
+    strike: float = 0  # TradingView often sends {{close}}; truncated, then round_strike snaps it
+    option_type: str = ""
+    side: str = ""
+    order_type: str = ""
+    price: float | str | None = None  # ""/null/missing mean 0, as before
+    product_type: str = ""
+    validity: str = ""
+    lots: int = 0
+    qty: int = 0
+    expiry: str | None = None  # futures only: any parseable date hint
+
+    def __post_init__(self):
+        # Enum-like fields are matched uppercase; blanks fall back to the defaults
+        self.index = self.index.upper().strip()
+        self.option_type = self.option_type.upper().strip()
+        self.side = self.side.upper().strip() or "BUY"
+        self.order_type = self.order_type.upper().strip() or "MARKET"
+        self.product_type = self.product_type.upper().strip() or "INTRADAY"
+        self.validity = self.validity.upper().strip() or "DAY"
+
+
+def _decode_alert(body: dict) -> TVAlert:
+    # strict=False lets numeric strings ("26000", "1") coerce into the int/float fields
+    return msgspec.convert(body, TVAlert, strict=False)
+
+
+_STEP_TABLE = {"NIFTY": 50, "BANKNIFTY": 100, "FINNIFTY": 50, "MIDCPNIFTY": 50}
+
+
 def round_strike(strike: int, index_symbol: str) -> int:
-    """Round strike price to valid trading levels based on index."""
-    step = 50 if "NIFTY" in index_symbol.upper() else 100
-    return round(strike / step) * step
+    """Round strike price to valid trading levels based on index (half rounds up)."""
+    step = _STEP_TABLE.get(index_symbol.upper(), 100)
+    return (strike + step // 2) // step * step
+
+
+@lru_cache(maxsize=512)
+def _cached_find(db_mtime_ns: int, db_path: str, index_symbol: str, strike: int, option_type: str, today: str) -> dict:
+    # db_mtime_ns only keys the cache: a rewritten DB file gets a new mtime, and
+    # today keeps contracts that expired overnight from being served
+    return _query_instrument(db_path, index_symbol, strike, option_type, today)
 
 
 def find_instrument(db_path: str, index_symbol: str, strike: int, option_type: str) -> dict:
-    """Find instrument based on actual DB format."""
-    with sqlite3.connect(db_path) as conn:
-        sql = """
-            SELECT securityId, tradingSymbol, segment, lotSize, expiry
-            FROM instruments
-            WHERE UPPER(tradingSymbol) LIKE ?
-              AND UPPER(tradingSymbol) LIKE ?
-        """
-        like_index = f"{index_symbol.upper()}%"
-        like_suffix = f"%-{strike}-{option_type.upper()}"
-        rows = conn.execute(sql, (like_index, like_suffix)).fetchall()
-
-        if not rows:
-            return {}
-
-        cols = ["securityId", "tradingSymbol", "segment", "lotSize", "expiry"]
-        today = datetime.now().date()
-
-        valid = []
-        for r in rows:
-            rec = dict(zip(cols, r))
-            expd = parse_expiry(rec.get("expiry", ""))
-            if expd and expd >= today:
-                valid.append((expd, rec))
-
-        if not valid:
-            return {}
-
-        valid.sort(key=lambda x: x[0])
-        return valid[0][1]
+    """Find the nearest non-expired option contract (expiry selection is done in SQL)."""
+    today = datetime.now().date().isoformat()
+    index_symbol, option_type = index_symbol.upper(), option_type.upper()
+    try:
+        mtime_ns = os.stat(db_path).st_mtime_ns
+    except OSError:
+        return _query_instrument(db_path, index_symbol, strike, option_type, today)
+    # Alerts tend to repeat the same contract in bursts; copy so callers can't mutate the cache
+    return dict(_cached_find(mtime_ns, db_path, index_symbol, strike, option_type, today))
+
+
+def _query_instrument(db_path: str, index_symbol: str, strike: int, option_type: str, today: str) -> dict:
+    # underlying/opt_type/strike/expiry_date are derived at ingest (see scheduler._ensure_indexes),
+    # so this is a single SEARCH on idx_contract; rows without an expiry have expiry_date NULL
+    sql = """
+        SELECT securityId, tradingSymbol, segment, lotSize, expiry
+        FROM instruments
+        WHERE underlying = ?
+          AND opt_type = ?
+          AND strike = ?
+          AND expiry_date >= ?
+        ORDER BY expiry_date ASC
+        LIMIT 1
+    """
+    params = (index_symbol, option_type, strike, today)
+    row = _instruments_conn(db_path).execute(sql, params).fetchone()
+    if not row:
+        return {}
+    return dict(row)
 
 
 def find_futures_instrument(db_path: str, index_symbol: str, expiry_hint: str | None = None) -> dict:
@@ -109,55 +317,45 @@ def find_futures_instrument(db_path: str, index_symbol: str, expiry_hint: str |
     - Otherwise we pick the nearest non-expired contract.
     Assumes Dhan tradingSymbol format includes '-FUT' and an expiry date string column.
     """
-    with sqlite3.connect(db_path) as conn:
-        sql = """
-            SELECT securityId, tradingSymbol, segment, lotSize, expiry
-            FROM instruments
-            WHERE UPPER(tradingSymbol) LIKE ?
-              AND UPPER(tradingSymbol) LIKE '%-FUT'
-        """
-        like_index = f"{index_symbol.upper()}%"
-        rows = conn.execute(sql, (like_index,)).fetchall()
-        if not rows:
-            return {}
-
-        cols = ["securityId", "tradingSymbol", "segment", "lotSize", "expiry"]
-        today = datetime.now().date()
-
-        # Parse rows with usable expiry >= today
-        candidates = []
-        for r in rows:
-            rec = dict(zip(cols, r))
-            expd = parse_expiry(rec.get("expiry", ""))
-            if expd and expd >= today:
-                candidates.append((expd, rec))
-
-        if not candidates:
-            return {}
-
-        # If user hinted a specific expiry, try to match closest to that date
-        if expiry_hint:
-            try:
-                target = parse_expiry(expiry_hint)
-            except Exception:
-                target = None
-            if target:
-                # sort by absolute distance from target, then by nearest future
-                candidates.sort(key=lambda x: (abs((x[0] - target).days), x[0]))
-                return candidates[0][1]
+    underlying = index_symbol.upper()
+    today = datetime.now().date().isoformat()
+
+    # If user hinted a specific expiry, pick the contract closest to that date
+    target = None
+    if expiry_hint:
+        try:
+            target = parse_expiry(expiry_hint)
+        except Exception:
+            target = None
 
+    if target:
+        # sort by absolute distance (in days) from target, then by nearest future
+        order_by = "ABS(julianday(expiry_date) - julianday(?)), expiry_date ASC"
+        params = (underlying, today, target.isoformat())
+    else:
         # Default: nearest non-expired future (earliest expiry >= today)
-        candidates.sort(key=lambda x: x[0])
-        return candidates[0][1]
+        order_by = "expiry_date ASC"
+        params = (underlying, today)
+    sql = f"""
+        SELECT securityId, tradingSymbol, segment, lotSize, expiry
+        FROM instruments
+        WHERE underlying = ?
+          AND opt_type = 'FUT'
+          AND expiry_date >= ?
+        ORDER BY {order_by}
+        LIMIT 1
+    """
+    row = _instruments_conn(db_path).execute(sql, params).fetchone()
+    if not row:
+        return {}
+    return dict(row)
 
 
-@router.post("/trade")
-async def webhook_trade(req: Request):
-    """Webhook endpoint for option trades."""
-    body = await req.json()
-    LOG.info("Webhook payload: %s", body)
-
-    # ------ Security checks (optional, enabled via env vars) ------
+def _check_webhook_access(req: Request) -> dict | None:
+    """
+    Security checks shared by all webhooks (optional, enabled via env vars).
+    Returns the error response when the request is rejected, else None.
+    """
     client_host = None
     try:
         client_host = req.client.host if req.client else None
@@ -165,8 +363,8 @@ async def webhook_trade(req: Request):
         client_host = None
 
     # 1) IP whitelist (if configured)
-    if WEBHOOK_IP_WHITELIST:
-        if not client_host or client_host not in WEBHOOK_IP_WHITELIST:
+    if WEBHOOK_IP_WHITELIST_SET:
+        if not client_host or client_host not in WEBHOOK_IP_WHITELIST_SET:
             LOG.warning("Webhook rejected: client ip %s not in whitelist", client_host)
             return {"status": "error", "message": "IP not allowed"}
 
@@ -192,23 +390,68 @@ async def webhook_trade(req: Request):
             return {"status": "error", "message": "Rate limit exceeded"}
         # record this request
         bucket.append(now)
-    # ---------------------------------------------------------------
+    return None
+
+
+async def _paper_trade(inst: dict, segment: str, side: str, qty: int, order_type: str, price: float, rid: str) -> dict:
+    """Paper-trading short-circuit shared by the options and futures webhooks."""
+    # For MARKET orders, fetch LTP; for LIMIT orders, use provided price
+    exec_price = price if order_type == "LIMIT" and price > 0 else None
+    if exec_price is None:
+        ltp = await run_in_threadpool(fetch_ltp_from_dhan, str(inst["securityId"]), segment)
+        if ltp is None or ltp <= 0:
+            LOG.warning("(%s) Paper trade: Could not fetch LTP (market closed / no data), skipping paper trade", rid)
+            return {"status": "success", "message": "Paper trade skipped - LTP unavailable (market closed)", "data": {"simulated": True, "skipped": True}}
+        exec_price = ltp
+
+    # Build payload for paper trading
+    paper_payload = {
+        "trading_symbol": inst["tradingSymbol"],
+        "security_id": str(inst["securityId"]),
+        "segment": segment,
+        "side": side,
+        "qty": qty,
+        "price": exec_price,
+        "order_type": order_type,
+        "rid": rid
+    }
+    result = await run_in_threadpool(execute_paper_trade_using_alert, paper_payload)
+    if result.get("status") == "error":
+        LOG.error("(%s) Paper trade failed: %s", rid, result.get("message"))
+    else:
+        result["data"] = {"simulated": True}
+        result["message"] = result.get("message", "Paper trade recorded")
+    return result
 
-    try:
-        ensure_fresh_db(SQLITE_PATH)
 
+@router.post("/trade")
+async def webhook_trade(req: Request, background_tasks: BackgroundTasks):
+    """Webhook endpoint for option trades."""
+    body = await _parse_tv_request(req)
+    LOG.info("Webhook payload: %s", body)
+
+    denied = _check_webhook_access(req)
+    if denied:
+        return denied
+    _maybe_refresh_db()
+
+    try:
         ok, why = broker_ready()
         if not ok:
             return {"status": "error", "message": f"Broker not ready: {why}"}
 
-        index_symbol = str(body.get("index", "")).upper()
-        raw_strike = int(body.get("strike", 0))
-        option_type = str(body.get("option_type", "")).upper()
-        side = str(body.get("side", "BUY")).upper()
-        order_type = str(body.get("order_type", "MARKET")).upper()
-        price = float(body.get("price") or 0)
-        product_type = str(body.get("product_type", "INTRADAY")).upper()
-        validity = str(body.get("validity", "DAY")).upper()
+        try:
+            alert = _decode_alert(body)
+        except msgspec.ValidationError as e:
+            return {"status": "error", "message": f"Invalid input: {e}"}
+        index_symbol = alert.index
+        raw_strike = int(alert.strike)
+        option_type = alert.option_type
+        side = alert.side
+        order_type = alert.order_type
+        price = float(alert.price or 0)
+        product_type = alert.product_type
+        validity = alert.validity
 
         if not index_symbol or raw_strike <= 0 or option_type not in ("CE", "PE"):
             return {"status": "error", "message": "Invalid input"}
@@ -217,15 +460,15 @@ async def webhook_trade(req: Request):
         strike = round_strike(raw_strike, index_symbol)
         LOG.info("Strike rounded: %s -> %s (%s)", raw_strike, strike, index_symbol)
 
-        inst = find_instrument(SQLITE_PATH, index_symbol, strike, option_type)
+        inst = await run_in_threadpool(find_instrument, SQLITE_PATH, index_symbol, strike, option_type)
         if not inst:
             return {"status": "error", "message": f"No instrument found for {index_symbol} {strike}{option_type}"}
 
         lot_size = int(inst.get("lotSize") or 1)
 
         # Quantity calculation
-        lots = int(body.get("lots", 0))   # new param
-        qty = int(body.get("qty", 0))     # backward-compatible
+        lots = alert.lots   # new param
+        qty = alert.qty     # backward-compatible
 
         if lots > 0:
             qty = lots * lot_size
@@ -250,7 +493,8 @@ async def webhook_trade(req: Request):
             return {"status": "error", "message": f"Could not infer segment for {inst}"}
 
         # Generate request ID for tracking
-        rid = str(uuid.uuid4())[:8]
+        ns = time.time_ns()
+        rid = _new_rid(ns)
         
         LOG.info("(%s) Options webhook: index=%s strike=%s option_type=%s side=%s product_type=%s segment=%s", 
                  rid, index_symbol, strike, option_type, side, product_type, segment)
@@ -259,39 +503,11 @@ async def webhook_trade(req: Request):
         # --- PAPER TRADING SHORT-CIRCUIT ---
         if _paper_enabled():
             # Record as paper trade instead of executing live
-            from paper_trading import execute_paper_trade_using_alert, fetch_ltp_from_dhan
-            
-            # For MARKET orders, fetch LTP; for LIMIT orders, use provided price
-            exec_price = price if order_type == "LIMIT" and price > 0 else None
-            if exec_price is None:
-                ltp = fetch_ltp_from_dhan(str(inst["securityId"]), segment)
-                if ltp is None or ltp <= 0:
-                    LOG.warning("(%s) Paper trade: Could not fetch LTP (market closed / no data), skipping paper trade", rid)
-                    result = {"status": "success", "message": "Paper trade skipped - LTP unavailable (market closed)", "data": {"simulated": True, "skipped": True}}
-                else:
-                    exec_price = ltp
-            
-            if exec_price and exec_price > 0:
-                # Build payload for paper trading
-                paper_payload = {
-                    "trading_symbol": inst["tradingSymbol"],
-                    "security_id": str(inst["securityId"]),
-                    "segment": segment,
-                    "side": side,
-                    "qty": qty,
-                    "price": exec_price,
-                    "order_type": order_type,
-                    "rid": rid
-                }
-                result = execute_paper_trade_using_alert(paper_payload)
-                if result.get("status") == "error":
-                    LOG.error("(%s) Paper trade failed: %s", rid, result.get("message"))
-                else:
-                    result["data"] = {"simulated": True}
-                    result["message"] = result.get("message", "Paper trade recorded")
+            result = await _paper_trade(inst, segment, side, qty, order_type, price, rid)
         else:
             # real live order path (unchanged)
-            raw_res = place_order_via_broker(
+            raw_res = await run_in_threadpool(
+                place_order_via_broker,
                 security_id=str(inst["securityId"]),
                 segment=segment,
                 side=side,
@@ -307,11 +523,11 @@ async def webhook_trade(req: Request):
             result = normalize_response(raw_res, success_msg="Order placed via webhook", error_msg="Webhook order failed")
 
         # Attach request info to alerts log
-        from copy import deepcopy
         alert_entry = {
             "id": rid,
-            "timestamp": datetime.now().isoformat(),
-            "trade": deepcopy(body),     # full original trade payload
+            "timestamp": _now_iso(ns),
+            "ts_epoch": ns // 1_000_000,
+            "trade": body,               # full original trade payload
             "instrument": inst,          # resolved instrument details
             "qty": qty,                  # final computed quantity
             "lots": lots,                # explicit lots entered
@@ -319,14 +535,8 @@ async def webhook_trade(req: Request):
             "response": result,          # broker response (success/failure + orderId etc.)
         }
 
-        # Store in in-memory list for dashboard
-        ALERTS_LOG.insert(0, alert_entry)
-        if len(ALERTS_LOG) > MAX_ALERTS:
-            ALERTS_LOG.pop()
-
-        # Log persistently for terminal/log files
-        ALERTS_LOGGER.info("ALERT | %s", alert_entry)
-
+        # Store for dashboard + log persistently, after the response is sent
+        background_tasks.add_task(_record_alert, "ALERT", alert_entry)
 
         return result
 
@@ -336,7 +546,7 @@ async def webhook_trade(req: Request):
 
 
 @router.post("/futures")
-async def webhook_futures(req: Request):
+async def webhook_futures(req: Request, background_tasks: BackgroundTasks):
     """
     Webhook endpoint for FUTURES trades.
     Body example:
@@ -352,63 +562,38 @@ async def webhook_futures(req: Request):
       "expiry": "2025-09-25"                # optional hint; nearest non-expired FUT will be chosen if omitted
     }
     """
-    body = await req.json()
+    body = await _parse_tv_request(req)
     LOG.info("Futures webhook payload: %s", body)
 
-    # ------ Security checks (same as options) ------
-    client_host = None
-    try:
-        client_host = req.client.host if req.client else None
-    except Exception:
-        client_host = None
-
-    if WEBHOOK_IP_WHITELIST:
-        if not client_host or client_host not in WEBHOOK_IP_WHITELIST:
-            LOG.warning("Webhook rejected: client ip %s not in whitelist", client_host)
-            return {"status": "error", "message": "IP not allowed"}
-
-    if WEBHOOK_API_KEY:
-        provided = req.headers.get("x-webhook-key") or req.headers.get("X-Webhook-Key")
-        if not provided or provided != WEBHOOK_API_KEY:
-            LOG.warning("Webhook rejected: missing/invalid API key from %s", client_host)
-            return {"status": "error", "message": "Invalid or missing API key"}
-
-    # Simple in-memory rate limiting (same as options)
-    if WEBHOOK_RATE_LIMIT and WEBHOOK_RATE_LIMIT > 0:
-        now = time.time()
-        ip = client_host or "unknown"
-        bucket = RATE_LIMIT_STORE.setdefault(ip, [])
-        cutoff = now - RATE_LIMIT_WINDOW_SECONDS
-        while bucket and bucket[0] < cutoff:
-            bucket.pop(0)
-        if len(bucket) >= WEBHOOK_RATE_LIMIT:
-            LOG.warning("Webhook rate-limited for %s (limit=%s/min)", ip, WEBHOOK_RATE_LIMIT)
-            return {"status": "error", "message": "Rate limit exceeded"}
-        bucket.append(now)
-    # ------------------------------------------------
+    denied = _check_webhook_access(req)
+    if denied:
+        return denied
+    _maybe_refresh_db()
 
     try:
-        ensure_fresh_db(SQLITE_PATH)  # keep instruments up-to-date
-
         ok, why = broker_ready()
         if not ok:
             return {"status": "error", "message": f"Broker not ready: {why}"}
 
-        index_symbol = str(body.get("index", "")).upper().strip()
-        side        = str(body.get("side", "BUY")).upper().strip()
-        order_type  = str(body.get("order_type", "MARKET")).upper().strip()
-        price       = float(body.get("price") or 0)
-        product_type= str(body.get("product_type", "INTRADAY")).upper().strip()
-        validity    = str(body.get("validity", "DAY")).upper().strip()
-        lots        = int(body.get("lots", 0))
-        qty         = int(body.get("qty", 0))
-        expiry_hint = body.get("expiry")  # any parseable string or YYYY-MM-DD
+        try:
+            alert = _decode_alert(body)
+        except msgspec.ValidationError as e:
+            return {"status": "error", "message": f"Invalid input: {e}"}
+        index_symbol = alert.index
+        side        = alert.side
+        order_type  = alert.order_type
+        price       = float(alert.price or 0)
+        product_type= alert.product_type
+        validity    = alert.validity
+        lots        = alert.lots
+        qty         = alert.qty
+        expiry_hint = alert.expiry  # any parseable string or YYYY-MM-DD
 
         if not index_symbol or side not in ("BUY", "SELL"):
             return {"status": "error", "message": "Invalid input"}
 
         # Find FUT instrument
-        inst = find_futures_instrument(SQLITE_PATH, index_symbol, expiry_hint)
+        inst = await run_in_threadpool(find_futures_instrument, SQLITE_PATH, index_symbol, expiry_hint)
         if not inst:
             return {"status": "error", "message": f"No FUT instrument found for {index_symbol} (expiry={expiry_hint or 'nearest'})"}
 
@@ -429,8 +614,8 @@ async def webhook_futures(req: Request):
             return {"status": "error", "message": f"Could not infer segment for {inst}"}
 
         # Generate request ID for tracking
-        import uuid
-        rid = str(uuid.uuid4())[:8]
+        ns = time.time_ns()
+        rid = _new_rid(ns)
         
         LOG.info("(%s) Futures webhook: index=%s side=%s product_type=%s segment=%s", 
                  rid, index_symbol, side, product_type, segment)
@@ -438,39 +623,11 @@ async def webhook_futures(req: Request):
         # --- PAPER TRADING SHORT-CIRCUIT ---
         if _paper_enabled():
             # Record as paper trade instead of executing live
-            from paper_trading import execute_paper_trade_using_alert, fetch_ltp_from_dhan
-            
-            # For MARKET orders, fetch LTP; for LIMIT orders, use provided price
-            exec_price = price if order_type == "LIMIT" and price > 0 else None
-            if exec_price is None:
-                ltp = fetch_ltp_from_dhan(str(inst["securityId"]), segment)
-                if ltp is None or ltp <= 0:
-                    LOG.warning("(%s) Paper trade: Could not fetch LTP (market closed / no data), skipping paper trade", rid)
-                    result = {"status": "success", "message": "Paper trade skipped - LTP unavailable (market closed)", "data": {"simulated": True, "skipped": True}}
-                else:
-                    exec_price = ltp
-            
-            if exec_price and exec_price > 0:
-                # Build payload for paper trading
-                paper_payload = {
-                    "trading_symbol": inst["tradingSymbol"],
-                    "security_id": str(inst["securityId"]),
-                    "segment": segment,
-                    "side": side,
-                    "qty": qty,
-                    "price": exec_price,
-                    "order_type": order_type,
-                    "rid": rid
-                }
-                result = execute_paper_trade_using_alert(paper_payload)
-                if result.get("status") == "error":
-                    LOG.error("(%s) Paper trade failed: %s", rid, result.get("message"))
-                else:
-                    result["data"] = {"simulated": True}
-                    result["message"] = result.get("message", "Paper trade recorded")
+            result = await _paper_trade(inst, segment, side, qty, order_type, price, rid)
         else:
             # real live order path (unchanged)
-            raw_res = place_order_via_broker(
+            raw_res = await run_in_threadpool(
+                place_order_via_broker,
                 security_id=str(inst["securityId"]),
                 segment=segment,
                 side=side,
@@ -486,22 +643,18 @@ async def webhook_futures(req: Request):
             result = normalize_response(raw_res, success_msg="Futures order placed via webhook", error_msg="Futures webhook order failed")
 
         # record in the same in-memory alerts log used by options
-        from copy import deepcopy
         alert_entry = {
             "id": rid,
-            "timestamp": datetime.now().isoformat(),
-            "trade": deepcopy(body),
+            "timestamp": _now_iso(ns),
+            "ts_epoch": ns // 1_000_000,
+            "trade": body,
             "instrument": inst,
             "qty": qty,
             "lots": lots,
             "lot_size": lot_size,
             "response": result,
         }
-        ALERTS_LOG.insert(0, alert_entry)
-        if len(ALERTS_LOG) > MAX_ALERTS:
-            ALERTS_LOG.pop()
-        ALERTS_LOGGER.info("ALERT-FUT | %s", alert_entry)
-
+        background_tasks.add_task(_record_alert, "ALERT-FUT", alert_entry)
 
         return result
 
@@ -511,7 +664,7 @@ async def webhook_futures(req: Request):
 
 
 @router.post("/paper")
-async def webhook_paper_trade(req: Request):
+async def webhook_paper_trade(req: Request, background_tasks: BackgroundTasks):
     """
     Webhook endpoint for paper trading using the new unified system.
     Supports both new format and legacy TradingView format.
@@ -538,40 +691,12 @@ async def webhook_paper_trade(req: Request):
       "lots": 1
     }
     """
-    body = await req.json()
+    body = await _parse_tv_request(req)
     LOG.info("Paper trading webhook payload: %s", body)
 
-    # ------ Security checks (same as other webhooks) ------
-    client_host = None
-    try:
-        client_host = req.client.host if req.client else None
-    except Exception:
-        client_host = None
-
-    if WEBHOOK_IP_WHITELIST:
-        if not client_host or client_host not in WEBHOOK_IP_WHITELIST:
-            LOG.warning("Webhook rejected: client ip %s not in whitelist", client_host)
-            return {"status": "error", "message": "IP not allowed"}
-
-    if WEBHOOK_API_KEY:
-        provided = req.headers.get("x-webhook-key") or req.headers.get("X-Webhook-Key")
-        if not provided or provided != WEBHOOK_API_KEY:
-            LOG.warning("Webhook rejected: missing/invalid API key from %s", client_host)
-            return {"status": "error", "message": "Invalid or missing API key"}
-
-    # Simple in-memory rate limiting
-    if WEBHOOK_RATE_LIMIT and WEBHOOK_RATE_LIMIT > 0:
-        now = time.time()
-        ip = client_host or "unknown"
-        bucket = RATE_LIMIT_STORE.setdefault(ip, [])
-        cutoff = now - RATE_LIMIT_WINDOW_SECONDS
-        while bucket and bucket[0] < cutoff:
-            bucket.pop(0)
-        if len(bucket) >= WEBHOOK_RATE_LIMIT:
-            LOG.warning("Webhook rate-limited for %s (limit=%s/min)", ip, WEBHOOK_RATE_LIMIT)
-            return {"status": "error", "message": "Rate limit exceeded"}
-        bucket.append(now)
-    # ------------------------------------------------
+    denied = _check_webhook_access(req)
+    if denied:
+        return denied
 
     try:
         # Convert legacy format to new format
@@ -591,33 +716,30 @@ async def webhook_paper_trade(req: Request):
             return {"status": "error", "message": "segment is required"}
 
         # Generate request ID for tracking
-        rid = str(uuid.uuid4())[:8]
+        ns = time.time_ns()
+        rid = _new_rid(ns)
         paper_payload["rid"] = paper_payload.get("rid", rid)
         
         LOG.info("(%s) Paper trading webhook: symbol=%s side=%s qty=%s price=%s", 
                  rid, paper_payload.get("trading_symbol"), paper_payload.get("side"), paper_payload.get("qty"), paper_payload.get("price"))
 
         # Execute using the new paper trading system
-        from paper_trading import execute_paper_trade_using_alert
-        result = execute_paper_trade_using_alert(paper_payload)
+        result = await run_in_threadpool(execute_paper_trade_using_alert, paper_payload)
         
         if result.get("status") == "error":
             LOG.error("(%s) Paper trade failed: %s", rid, result.get("message"))
             return result
 
         # Record in alerts log
-        from copy import deepcopy
         alert_entry = {
             "id": rid,
-            "timestamp": datetime.now().isoformat(),
-            "trade": deepcopy(body),  # Original payload
-            "converted_payload": deepcopy(paper_payload),  # Converted payload
+            "timestamp": _now_iso(ns),
+            "ts_epoch": ns // 1_000_000,
+            "trade": body,  # Original payload
+            "converted_payload": paper_payload,  # Converted payload
             "response": result,
         }
-        ALERTS_LOG.insert(0, alert_entry)
-        if len(ALERTS_LOG) > MAX_ALERTS:
-            ALERTS_LOG.pop()
-        ALERTS_LOGGER.info("ALERT-PAPER | %s", alert_entry)
+        background_tasks.add_task(_record_alert, "ALERT-PAPER", alert_entry)
 
         return result
 
@@ -673,7 +795,7 @@ def convert_legacy_format(body):
             "side": str(body.get("side", "BUY")).upper(),
             "qty": qty,
             "price": float(body.get("price", 0)),
-            "rid": str(uuid.uuid4())[:8]
+            "rid": _new_rid()
         }
         
         LOG.info("Converted legacy format: %s -> %s", body, paper_payload)
@@ -683,9 +805,23 @@ def convert_legacy_format(body):
     return body
 
 
-@router.get("/alerts")
-def get_alerts():
-    """Get recent webhook alerts."""
-    return {"status": "success", "alerts": ALERTS_LOG}
+@router.get("/alerts", response_class=Response)
+def get_alerts(limit: int | None = Query(None, ge=1, le=MAX_ALERTS)):
+    """Get recent webhook alerts, newest first (the full log is served from a cached orjson payload)."""
+    global _alerts_cache_bytes
+    with _ALERTS_LOCK:
+        if _prune_alerts():
+            _alerts_cache_bytes = None
+        if limit is not None and limit < len(ALERTS_LOG):
+            # Only the newest `limit` entries; islice avoids copying the whole deque
+            items = list(itertools.islice(ALERTS_LOG, limit))
+            payload = None
+        else:
+            if _alerts_cache_bytes is None:
+                _alerts_cache_bytes = orjson.dumps({"status": "success", "alerts": list(ALERTS_LOG)}, default=str)
+            payload = _alerts_cache_bytes
+    if payload is None:
+        payload = orjson.dumps({"status": "success", "alerts": items}, default=str)
+    return Response(content=payload, media_type="application/json")
 
 
@@ -1,55 +1,62 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Generate 1 month of 1-minute NIFTY futures data
-np.random.seed(42)
+rng = np.random.default_rng(42)
 
 start_date = datetime(2025, 9, 12, 9, 15)
-data = []
 
 # Trading hours: 9:15 AM to 3:30 PM (375 minutes per day)
+MINUTES_PER_DAY = 375
 base_price = 25000
-current_price = base_price
-
-# Generate 20 trading days
-for day in range(20):
-    day_date = start_date + timedelta(days=day)
-    
-    # Skip weekends
-    if day_date.weekday() >= 5:
-        continue
-    
-    # Generate intraday data
-    for minute in range(375):
-        timestamp = day_date + timedelta(minutes=minute)
-        
-        # Random walk with trend
-        change = np.random.normal(0, 3)  # Volatility
-        current_price += change
-        
-        # Generate OHLC
-        open_price = current_price
-        high_price = open_price + abs(np.random.normal(0, 2))
-        low_price = open_price - abs(np.random.normal(0, 2))
-        close_price = open_price + np.random.normal(0, 1.5)
-        volume = int(np.random.uniform(1000, 50000))
-        
-        data.append({
-            'time': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            'open': round(open_price, 2),
-            'high': round(high_price, 2),
-            'low': round(low_price, 2),
-            'close': round(close_price, 2),
-            'volume': volume
-        })
-        
-        current_price = close_price
-
-df = pd.DataFrame(data)
-df.to_csv('ohlcv.csv', index=False)
-print(f"Generated {len(df)} candles of sample NIFTY futures data")
-print(f"Date range: {df['time'].iloc[0]} to {df['time'].iloc[-1]}")
-print(f"Price range: {df['close'].min():.2f} to {df['close'].max():.2f}")
 
+# Generate 20 calendar days, skipping weekends
+days = pd.date_range(start_date, periods=20, freq='D')
+days = days[days.weekday < 5]
+n = len(days) * MINUTES_PER_DAY
 
+# Every trading day's minute grid, in order
+minutes = pd.to_timedelta(np.arange(MINUTES_PER_DAY), unit='min')
+times = pd.DatetimeIndex((days.values[:, None] + minutes.values[None, :]).ravel())
+
+# Random walk with trend: all samples drawn up front, one call per series
+change = rng.normal(0, 3, n)  # Volatility
+high_off = np.abs(rng.normal(0, 2, n))
+low_off = np.abs(rng.normal(0, 2, n))
+close_off = rng.normal(0, 1.5, n)
+volume = rng.uniform(1000, 50000, n).astype(np.int64)
+
+# Each candle opens at the previous close plus `change`, so the closes are a
+# cumulative sum over both steps
+close_price = base_price + np.cumsum(change + close_off)
+open_price = close_price - close_off
+high_price = open_price + high_off
+low_price = open_price - low_off
+
+# Narrow dtypes keep the Parquet file small (float32 OHLC, uint32 volume)
+columns = {
+    'time': times.values.astype('datetime64[s]'),
+    'open': open_price.round(2).astype(np.float32),
+    'high': high_price.round(2).astype(np.float32),
+    'low': low_price.round(2).astype(np.float32),
+    'close': close_price.round(2).astype(np.float32),
+    'volume': volume.astype(np.uint32),
+}
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Arrow arrays straight from the NumPy columns; no DataFrame in between
+    table = pa.Table.from_arrays([pa.array(v) for v in columns.values()], names=list(columns))
+    pq.write_table(table, 'ohlcv.parquet', compression='snappy')
+    out_file = 'ohlcv.parquet'
+except ImportError:
+    # pyarrow not installed: fall back to the plain CSV output
+    # to_csv formats the datetime column itself; no separate string column
+    pd.DataFrame(columns).to_csv('ohlcv.csv', index=False, date_format='%Y-%m-%d %H:%M:%S')
+    out_file = 'ohlcv.csv'
+close = columns['close']
+print(f"Generated {n} candles of sample NIFTY futures data -> {out_file}")
+print(f"Date range: {times[0]} to {times[-1]}")
+print(f"Price range: {close.min():.2f} to {close.max():.2f}")
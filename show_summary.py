@@ -1,49 +1,84 @@
+import os
+
+import numpy as np
 import pandas as pd
 
-df = pd.read_csv('grid_results.csv')
+# Only the columns the report prints
+COLUMNS = ['length', 'len_mult', 'net_pnl', 'win_rate', 'profit_factor', 'total_trades', 'max_drawdown']
+# Metric columns stay float64: float32 shifts medians and prints noise like 1435.780029
+# length/len_mult stay numeric: categoricals change how the top-5 tables print
+DTYPES = {'length': 'int32', 'total_trades': 'int32'}
+CSV_PATH = 'grid_results.csv'
+PARQUET_PATH = 'grid_results.parquet'
+
+# Prefer the columnar Parquet results unless the CSV has been rewritten since
+if os.path.exists(PARQUET_PATH) and (
+        not os.path.exists(CSV_PATH) or os.path.getmtime(PARQUET_PATH) >= os.path.getmtime(CSV_PATH)):
+    # astype also normalizes caches written when length was categorical
+    df = pd.read_parquet(PARQUET_PATH, columns=COLUMNS).astype(DTYPES)
+else:
+    df = pd.read_csv(CSV_PATH, usecols=COLUMNS, dtype=DTYPES)
+    # Best-effort Parquet cache so later runs skip the CSV parse; the report must
+    # still print if pyarrow is missing or the directory isn't writable
+    try:
+        df.to_parquet(PARQUET_PATH, compression='snappy', index=False)
+    except Exception:
+        pass
+
+n = len(df)
+pnl = df['net_pnl'].to_numpy()
+n_pos = int(np.count_nonzero(pnl > 0))
+n_neg = int(np.count_nonzero(pnl < 0))
+
+# All per-column statistics in one aggregation
+stats = df[['net_pnl', 'win_rate', 'profit_factor', 'total_trades', 'max_drawdown']].agg(['min', 'max', 'mean', 'median'])
+
+
+def top5(col, cols):
+    """Five largest rows by `col`, projected to `cols` first."""
+    return df[cols].nlargest(5, col)
+
 
 print('\n' + '='*70)
 print('BACKTEST SUMMARY STATISTICS - ALL 256 COMBINATIONS')
 print('='*70)
-print(f'\nTotal Combinations Tested: {len(df)}')
-print(f'\nProfitable Combinations: {(df["net_pnl"] > 0).sum()} ({(df["net_pnl"] > 0).sum()/len(df)*100:.1f}%)')
-print(f'Loss-making Combinations: {(df["net_pnl"] < 0).sum()} ({(df["net_pnl"] < 0).sum()/len(df)*100:.1f}%)')
+print(f'\nTotal Combinations Tested: {n}')
+print(f'\nProfitable Combinations: {n_pos} ({n_pos/n*100:.1f}%)')
+print(f'Loss-making Combinations: {n_neg} ({n_neg/n*100:.1f}%)')
 
 print(f'\n--- Net PnL Statistics ---')
-print(f'Best Net PnL: {df["net_pnl"].max():.2f} points')
-print(f'Worst Net PnL: {df["net_pnl"].min():.2f} points')
-print(f'Average Net PnL: {df["net_pnl"].mean():.2f} points')
-print(f'Median Net PnL: {df["net_pnl"].median():.2f} points')
+print(f'Best Net PnL: {stats.at["max", "net_pnl"]:.2f} points')
+print(f'Worst Net PnL: {stats.at["min", "net_pnl"]:.2f} points')
+print(f'Average Net PnL: {stats.at["mean", "net_pnl"]:.2f} points')
+print(f'Median Net PnL: {stats.at["median", "net_pnl"]:.2f} points')
 
 print(f'\n--- Performance Metrics ---')
-print(f'Average Win Rate: {df["win_rate"].mean():.2f}%')
-print(f'Best Win Rate: {df["win_rate"].max():.2f}%')
-print(f'Average Profit Factor: {df["profit_factor"].mean():.2f}')
-print(f'Best Profit Factor: {df["profit_factor"].max():.2f}')
+print(f'Average Win Rate: {stats.at["mean", "win_rate"]:.2f}%')
+print(f'Best Win Rate: {stats.at["max", "win_rate"]:.2f}%')
+print(f'Average Profit Factor: {stats.at["mean", "profit_factor"]:.2f}')
+print(f'Best Profit Factor: {stats.at["max", "profit_factor"]:.2f}')
 
 print(f'\n--- Trading Activity ---')
-print(f'Average Trades per Combo: {df["total_trades"].mean():.0f}')
-print(f'Max Trades: {df["total_trades"].max():.0f}')
-print(f'Min Trades: {df["total_trades"].min():.0f}')
+print(f'Average Trades per Combo: {stats.at["mean", "total_trades"]:.0f}')
+print(f'Max Trades: {stats.at["max", "total_trades"]:.0f}')
+print(f'Min Trades: {stats.at["min", "total_trades"]:.0f}')
 
 print(f'\n--- Risk Metrics ---')
-print(f'Average Max Drawdown: {df["max_drawdown"].mean():.2f} points')
-print(f'Best (Lowest) Max Drawdown: {df["max_drawdown"].min():.2f} points')
-print(f'Worst Max Drawdown: {df["max_drawdown"].max():.2f} points')
+print(f'Average Max Drawdown: {stats.at["mean", "max_drawdown"]:.2f} points')
+print(f'Best (Lowest) Max Drawdown: {stats.at["min", "max_drawdown"]:.2f} points')
+print(f'Worst Max Drawdown: {stats.at["max", "max_drawdown"]:.2f} points')
 
 print('\n' + '='*70)
 print('TOP 5 BY DIFFERENT METRICS')
 print('='*70)
 
 print('\n--- Top 5 by Net PnL ---')
-print(df.nlargest(5, 'net_pnl')[['length', 'len_mult', 'net_pnl', 'win_rate', 'profit_factor', 'total_trades']].to_string(index=False))
+print(top5('net_pnl', ['length', 'len_mult', 'net_pnl', 'win_rate', 'profit_factor', 'total_trades']).to_string(index=False))
 
 print('\n--- Top 5 by Win Rate ---')
-print(df.nlargest(5, 'win_rate')[['length', 'len_mult', 'win_rate', 'net_pnl', 'profit_factor', 'total_trades']].to_string(index=False))
+print(top5('win_rate', ['length', 'len_mult', 'win_rate', 'net_pnl', 'profit_factor', 'total_trades']).to_string(index=False))
 
 print('\n--- Top 5 by Profit Factor ---')
-print(df.nlargest(5, 'profit_factor')[['length', 'len_mult', 'profit_factor', 'net_pnl', 'win_rate', 'total_trades']].to_string(index=False))
+print(top5('profit_factor', ['length', 'len_mult', 'profit_factor', 'net_pnl', 'win_rate', 'total_trades']).to_string(index=False))
 
 print('\n' + '='*70)
-
-
@@ -1,77 +1,93 @@
-import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-def test_endpoint(name, url, payload):
-    print(f"\n{'='*60}")
+from _http_session import SESSION
+
+_RULE = "=" * 60
+
+def send(url, payload):
+    """POST one webhook; returns the response, or the exception it raised."""
+    try:
+        return SESSION.post(url, json=payload, timeout=10)
+    except Exception as e:
+        return e
+
+def report(name, url, payload, response):
+    print(f"\n{_RULE}")
     print(f"Testing: {name}")
     print(f"URL: {url}")
     print(f"Payload: {json.dumps(payload, indent=2)}")
-    print('='*60)
+    print(_RULE)
     
-    try:
-        response = requests.post(url, json=payload, timeout=10)
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {response.text[:500]}")
-        
-        if response.status_code >= 400:
-            print(f"❌ FAILED with status {response.status_code}")
-            return False
-        else:
-            print(f"✅ SUCCESS")
-            return True
-            
-    except Exception as e:
-        print(f"❌ ERROR: {type(e).__name__}: {e}")
+    if isinstance(response, Exception):
+        print(f"❌ ERROR: {type(response).__name__}: {response}")
+        return False
+
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {response.text[:500]}")
+    
+    if response.status_code >= 400:
+        print(f"❌ FAILED with status {response.status_code}")
         return False
+    else:
+        print(f"✅ SUCCESS")
+        return True
 
-# Test 1: Paper Trading Endpoint
-test_endpoint(
-    "Paper Trading Endpoint",
-    "http://localhost:8000/webhook/paper",
-    {
-        "index": "NIFTY",
-        "side": "BUY",
-        "price": 25500,
-        "lots": 1,
-        "order_type": "MARKET",
-        "product_type": "INTRADAY",
-        "validity": "DAY"
-    }
-)
+TESTS = [
+    # Test 1: Paper Trading Endpoint
+    (
+        "Paper Trading Endpoint",
+        "http://localhost:8000/webhook/paper",
+        {
+            "index": "NIFTY",
+            "side": "BUY",
+            "price": 25500,
+            "lots": 1,
+            "order_type": "MARKET",
+            "product_type": "INTRADAY",
+            "validity": "DAY"
+        },
+    ),
+    # Test 2: Options Webhook (when paper trading is enabled)
+    (
+        "Options Trade Endpoint",
+        "http://localhost:8000/webhook/trade",
+        {
+            "index": "NIFTY",
+            "strike": 25500,
+            "option_type": "CE",
+            "side": "BUY",
+            "lots": 1,
+            "order_type": "MARKET",
+            "product_type": "INTRADAY",
+            "validity": "DAY"
+        },
+    ),
+    # Test 3: Futures Webhook (when paper trading is enabled)
+    (
+        "Futures Trade Endpoint",
+        "http://localhost:8000/webhook/futures",
+        {
+            "index": "NIFTY",
+            "side": "BUY",
+            "lots": 1,
+            "order_type": "MARKET",
+            "price": 0,
+            "product_type": "INTRADAY",
+            "validity": "DAY"
+        },
+    ),
+]
 
-# Test 2: Options Webhook (when paper trading is enabled)
-test_endpoint(
-    "Options Trade Endpoint",
-    "http://localhost:8000/webhook/trade",
-    {
-        "index": "NIFTY",
-        "strike": 25500,
-        "option_type": "CE",
-        "side": "BUY",
-        "lots": 1,
-        "order_type": "MARKET",
-        "product_type": "INTRADAY",
-        "validity": "DAY"
-    }
-)
+# The webhooks are independent: send them concurrently, then report in order
+with ThreadPoolExecutor(max_workers=len(TESTS)) as pool:
+    responses = list(pool.map(lambda t: send(t[1], t[2]), TESTS))
 
-# Test 3: Futures Webhook (when paper trading is enabled)
-test_endpoint(
-    "Futures Trade Endpoint",
-    "http://localhost:8000/webhook/futures",
-    {
-        "index": "NIFTY",
-        "side": "BUY",
-        "lots": 1,
-        "order_type": "MARKET",
-        "price": 0,
-        "product_type": "INTRADAY",
-        "validity": "DAY"
-    }
-)
+for (name, url, payload), response in zip(TESTS, responses):
+    report(name, url, payload, response)
 
-print(f"\n{'='*60}")
+print(f"\n{_RULE}")
 print("Test Complete")
-print('='*60)
+print(_RULE)
 
 
@@ -2,9 +2,8 @@
 """Test paper trading API endpoints"""
 import requests
 import json
-import time
 
-BASE_URL = "http://localhost:8000"
+from _http_session import BASE_URL, SESSION, wait_for_server
 
 print("=" * 70)
 print("PAPER TRADING API TEST")
@@ -17,9 +16,9 @@ def test_endpoint(method, path, params=None, data=None, description=""):
     url = f"{BASE_URL}{path}"
     try:
         if method == "GET":
-            response = requests.get(url, params=params, timeout=5)
+            response = SESSION.get(url, params=params, timeout=5)
         elif method == "POST":
-            response = requests.post(url, params=params, json=data, timeout=5)
+            response = SESSION.post(url, params=params, json=data, timeout=5)
         else:
             print(f"❌ Unknown method: {method}")
             return None
@@ -42,9 +41,9 @@ def test_endpoint(method, path, params=None, data=None, description=""):
         print(f"   ERROR: {e}")
         return None
 
-# Wait a moment for server to be ready
+# Wait for the server to be ready
 print("\nWaiting for server to start...")
-time.sleep(2)
+wait_for_server()
 
 # Test 1: Check backend status
 test_endpoint("GET", "/status", description="1️⃣  Testing backend status")
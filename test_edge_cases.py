@@ -1,13 +1,14 @@
-import requests
 import json
 
-BASE_URL = "http://localhost:8000"
+from _http_session import BASE_URL, SESSION
+
+_RULE = "=" * 60
 
 def test(name, endpoint, payload):
-    print(f"\n{'='*60}")
+    print(f"\n{_RULE}")
     print(f"Test: {name}")
     try:
-        r = requests.post(f"{BASE_URL}{endpoint}", json=payload, timeout=5)
+        r = SESSION.post(f"{BASE_URL}{endpoint}", json=payload, timeout=5)
         print(f"Status: {r.status_code}")
         print(f"Response: {r.text[:200]}")
         if r.status_code >= 500:
@@ -39,21 +40,21 @@ tests = [
 ]
 
 print("Testing Edge Cases for Internal Server Errors")
-print("="*60)
+print(_RULE)
 
 failures = []
 for name, endpoint, payload in tests:
     if not test(name, endpoint, payload):
         failures.append(name)
 
-print(f"\n{'='*60}")
+print(f"\n{_RULE}")
 print(f"Tests Complete")
 print(f"Failures: {len(failures)}")
 if failures:
     print("Failed tests:", failures)
 else:
     print("✅ All tests passed - no internal server errors found!")
-print('='*60)
+print(_RULE)
 
 
 
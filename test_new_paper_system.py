@@ -4,7 +4,7 @@ import requests
 import json
 import time
 
-BASE_URL = "http://localhost:8000"
+from _http_session import BASE_URL, SESSION, wait_for_server
 
 print("=" * 80)
 print("NEW PAPER TRADING SYSTEM TEST")
@@ -17,9 +17,9 @@ def test_endpoint(method, path, params=None, data=None, description=""):
     url = f"{BASE_URL}{path}"
     try:
         if method == "GET":
-            response = requests.get(url, params=params, timeout=10)
+            response = SESSION.get(url, params=params, timeout=10)
         elif method == "POST":
-            response = requests.post(url, params=params, json=data, timeout=10)
+            response = SESSION.post(url, params=params, json=data, timeout=10)
         else:
             print(f"❌ Unknown method: {method}")
             return None
@@ -32,11 +32,16 @@ def test_endpoint(method, path, params=None, data=None, description=""):
         
         try:
             result = response.json()
-            print(f"   Response (first 500 chars): {json.dumps(result, indent=2)[:500]}...")
-            return result
-        except:
+        except ValueError:
             print(f"   Response: {response.text[:200]}")
             return None
+        # Pretty-print only small bodies; for large ones show the raw text instead
+        # of re-serializing the whole structure just to slice it
+        if len(response.content) < 2048:
+            print(f"   Response: {json.dumps(result, indent=2)}")
+        else:
+            print(f"   Response (first 500 chars): {response.text[:500]}...")
+        return result
     except requests.exceptions.ConnectionError:
         print(f"\n❌ {description}")
         print(f"   ERROR: Cannot connect to {BASE_URL}")
@@ -49,7 +54,7 @@ def test_endpoint(method, path, params=None, data=None, description=""):
 
 # Wait for server
 print("\n⏳ Waiting for server to be ready...")
-time.sleep(2)
+wait_for_server()
 
 # Test 1: Check backend status
 test_endpoint("GET", "/status", description="1️⃣  Testing backend status")